@@ -4,7 +4,10 @@ import sys
 import logging
 import coloredlogs
 import traceback
-import openpyxl
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 import pandas as pd
 import numpy as np
 from datetime import datetime, time, timedelta
@@ -12,14 +15,21 @@ import pandapower as pp
 import pandapower.control as control
 import pandapower.timeseries as timeseries
 from pandapower.timeseries.data_sources.frame_data import DFData
-import warnings
 
 log = logging.getLogger(__name__)
 coloredlogs.install(level="INFO")
 
+# Numba compiles pandapower powerflow solver which is the bottleneck of timeseries simulations
+try:
+    import numba
+    NUMBA_AVAILABLE: bool = True
+except ImportError:
+    NUMBA_AVAILABLE: bool = False
+    log.error("numba cannot be imported: timeseries simulations will be very slow. Please install numba.")
+
 # TODO: (Deadline -- 2023-09-12) Deploy some useful examples on function that students will use (only those ones).
 #       Develop a deep understanding of LTI's function and apply them in the tutorial notebook for next week.
-def load_net_from_xlsx(file_path: str) -> pp.pandapowerNet:
+def load_net_from_xlsx(file_path: str, max_workers: int = 1) -> pp.pandapowerNet:
     r"""Create a pandaPower network object using data stored in a xlsx file. 
     
     Pay attention to the following points:
@@ -33,6 +43,9 @@ def load_net_from_xlsx(file_path: str) -> pp.pandapowerNet:
     ----------
     file_path : str
         File path of the xlsx file where the power network data are stored.
+    max_workers : int, 1
+        Number of threads used to read sheet tables in parallel.
+        It only pays off for large xlsx files with several filled sheets.
 
     Returns
     -------
@@ -53,6 +66,8 @@ def load_net_from_xlsx(file_path: str) -> pp.pandapowerNet:
         "tap_step_degree": 0.0, "vm_pu": 1.0, "va_degree": 0.0, "slack_weight": 1.0, "tap_pos": 0, "tap_neutral": 0,
         "tap_min": 0, "tap_max": 1, "profile_mapping": -1, "current_source": True, "name": ""
     }
+    # Bus and load types which have to be set by default when None value is founded
+    type_default_values: dict = {"bus": {"type": "b"}, "load": {"type": "wye"}}
 
     # Columns which as to be converted to another type
     int_column: list[str] = ["bus", "parallel", "from_bus", "to_bus", "element", "hv_bus", "lv_bus", "tap_pos",
@@ -65,6 +80,17 @@ def load_net_from_xlsx(file_path: str) -> pp.pandapowerNet:
         "const_i_percent", "scaling", "vk0_percent", "vkr0_percent", "mag0_percent",
         "mag0_rx", "si0_hv_partial", "shift_degree", "tap_step_percent",
     ]
+    # Text columns where null values have to be None even if they are empty in the Excel file
+    none_columns: list[str] = ["type", "std_type", "vector_group", "tap_side", "zone", "et"]
+    # Column types applied while reading Excel file (nullable integers since default values are not filled yet)
+    read_types: dict = {"name": str}
+    read_types.update({col: "Int64" for col in int_column})
+    read_types.update({col: "float64" for col in float_columns})
+    # Wanted type of every column to be converted after filling default values and its name used in error messages
+    column_types: dict = {"name": str}
+    column_types.update({col: "int64" for col in int_column})
+    column_types.update({col: bool for col in bool_column})
+    type_names: dict = {str: "string", "Int64": "integer", "int64": "integer", "float64": "float", bool: "boolean"}
     non_null_columns: dict = {
         "bus": ["vn_kv"], 
         "line": ["from_bus", "to_bus", "length_km", "r_ohm_per_km", "x_ohm_per_km", "c_nf_per_km", "max_i_ka"],
@@ -84,48 +110,53 @@ def load_net_from_xlsx(file_path: str) -> pp.pandapowerNet:
     }
     # Create empty network
     net: pp.pandapowerNet = pp.create_empty_network()
-    eq_names = openpyxl.load_workbook(file_path).sheetnames
-    eq_names.remove("bus")
-    eq_names = ["bus"] + eq_names
-    # Open Excel file and iterate over every existing sheet table
+    # Read every Excel sheet table (cached until the file is modified)
+    try:
+        all_sheets = _read_net_sheets(
+            os.path.abspath(file_path), _file_version(file_path), tuple(read_types.items()), max_workers
+        )
+    except(ValueError, TypeError):
+        # Read sheet tables again without column types in order to find which column can not be converted
+        raw_sheets = _read_sheets(os.path.abspath(file_path), header_rows=1, max_workers=1)
+        for eq_name, raw_df in raw_sheets.items():
+            _check_column_types(
+                raw_df, {col: read_types[col] for col in raw_df.columns if col in read_types}, type_names, eq_name
+            )
+        raise
+    # Empty sheet tables are not read so bus sheet may be missing
+    eq_names = sorted(all_sheets.keys(), key=lambda name: name != "bus")
+    # Iterate over every existing sheet table (bus sheet first)
     for eq_name in eq_names:
         # Create a dataFrame form an Excel sheet table
-        data_df: pd.DataFrame = pd.read_excel(file_path, sheet_name=eq_name).drop(columns="idx").dropna(how="all")
+        data_df: pd.DataFrame = all_sheets[eq_name].drop(columns="idx").dropna(how="all")
         if not data_df.empty:
-            # Fill null values using default_values dictionary
-            data_df.fillna(value=default_values, inplace=True)
-            # Fill bus and load types
-            if eq_name == "bus":
-                data_df.fillna(value={"type": "b"}, inplace=True)
-            elif eq_name == "load":
-                data_df.fillna(value={"type": "wye"}, inplace=True)
-            elif eq_name == "line_geodata":
-                # Create list of coordinates from string
-                data_df["coords"] = data_df.coords.apply(
-                    lambda x: list(map(lambda y: [float(z) for z in y.split(",")],
-                                       x.replace("[[", "").replace("]]", "").split("], ["))))
-            # Change needed columns type from float to int64
-            for col in list(set(data_df.columns).intersection(int_column)):
-                try:
-                    data_df[col] = data_df[col].astype('int64')
-                except(Exception, ):
-                    raise RuntimeError("Impossible to convert {} column into integer in {} equipment.".format(col, eq_name))
-                        # Change needed columns type from float to int64
-            for col in list(set(data_df.columns).intersection(float_columns)):
-                try:
-                    data_df[col] = data_df[col].astype('float64')
-                except(Exception, ):
-                    raise RuntimeError("Impossible to convert {} column into float in {} equipment.".format(col, eq_name))
-            # Change needed columns type from float to bool
-            for col in list(set(data_df.columns).intersection(bool_column)):
-                try:
-                    data_df[col] = data_df[col].astype(bool)
-                except(Exception, ):
-                    raise RuntimeError("Impossible to convert {} column into boolean in {} equipment.".format(col, eq_name))
-    
-            data_df["name"] = data_df["name"].astype(str)
-            # Replace np.nan to None
-            data_df = data_df.replace(np.nan, None)
+            # Fill null values (bus and load types included) using default values dictionaries in a single pass
+            data_df.fillna(value={**default_values, **type_default_values.get(eq_name, {})}, inplace=True)
+            if eq_name == "line_geodata":
+                # Create list of coordinates from string (parse every float at once, then pair them)
+                brackets = str.maketrans("", "", "[]")
+                coords: list = []
+                for idx, x in zip(data_df.index, data_df["coords"].values):
+                    try:
+                        coords.append(
+                            np.array(x.translate(brackets).split(","), dtype=np.float64).reshape(-1, 2).tolist()
+                        )
+                    except(Exception, ):
+                        raise RuntimeError(
+                            "Impossible to convert coords of row {} into coordinates in {} equipment.".format(
+                                idx, eq_name))
+                data_df["coords"] = coords
+            # Change needed columns type in a single conversion
+            dtype_map: dict = {col: column_types[col] for col in data_df.columns if col in column_types}
+            try:
+                data_df = data_df.astype(dtype_map)
+            except(Exception, ):
+                _check_column_types(data_df, dtype_map, type_names, eq_name)
+                raise
+            # Replace np.nan to None only in text columns (numerical columns keep their type)
+            for col in data_df.columns:
+                if data_df[col].dtype == object or (col in none_columns and data_df[col].hasnans):
+                    data_df[col] = data_df[col].astype(object).where(data_df[col].notna(), None)
 
             # Check if non-null columns have null^values
             for col in non_null_columns[eq_name]:
@@ -146,7 +177,7 @@ def load_net_from_xlsx(file_path: str) -> pp.pandapowerNet:
     return net
 
 
-def load_power_profile_form_xlsx(file_path: str) -> \
+def load_power_profile_form_xlsx(file_path: str, max_workers: int = 1) -> \
         (dict)[str, dict[str, pd.DataFrame]]:
     r"""Load power profile from a xlsx file and return a dictionary of pandas DataFrame ready to be applied to a pandaPower network for timeseries simulations.
     
@@ -157,6 +188,9 @@ def load_power_profile_form_xlsx(file_path: str) -> \
     ----------
     file_path : str
         File path of the xlsx file where the power network data are stored.
+    max_workers : int, 1
+        Number of threads used to read sheet tables in parallel.
+        It only pays off for large xlsx files with several filled sheets.
 
     Returns
     -------
@@ -177,12 +211,11 @@ def load_power_profile_form_xlsx(file_path: str) -> \
     end_time = time()
     start_time = time(23, 59, 59)
 
-    # Load every Excel sheet names
-    for eq_name in openpyxl.load_workbook(file_path).sheetnames:
-        # Create a dataFrame form an Excel sheet table
-        data_df = pd.read_excel(
-            file_path, sheet_name=eq_name, header=[0, 1], index_col=0
-        ).dropna(how="all", axis=1).dropna(how="all", axis=0)
+    # Read every Excel sheet table (cached until the file is modified)
+    all_sheets = _read_profile_sheets(os.path.abspath(file_path), _file_version(file_path), max_workers)
+    for eq_name, data_df in all_sheets.items():
+        # Drop empty rows and columns from the Excel sheet table
+        data_df = data_df.dropna(how="all", axis=1).dropna(how="all", axis=0)
         # If there is no data within the Excel sheet don't save the dataFrame
         if not data_df.empty:
             # Save DataFrame in power profile dictionary  
@@ -190,53 +223,50 @@ def load_power_profile_form_xlsx(file_path: str) -> \
 
             # Find the most suitable common period, start time and end time
             try:
-                if data_df.index.dtype != time:
-                    date_time = pd.to_datetime(pd.Series(data_df.index), format= '%H:%M:%S')
-                else:    
-                    date_time = pd.Series(data_df.index).apply(lambda x: datetime.combine(datetime.today(), x))
-            except:
+                seconds = _time_to_seconds(data_df.index)
+            except(Exception, ):
                 raise RuntimeError("Time column is not in a suitable format. Please use a time (HH:MM:SS) format in excel sheet")
-                
-            period = min(period, date_time.diff().min())
+
+            if seconds.shape[0] > 1:
+                period = min(period, timedelta(seconds=np.diff(seconds).min()))
             start_time = min(start_time, data_df.index[0])
             end_time = max(end_time, data_df.index[-1])
 
     # Create common datetime index for every power profiles
-    datetime_index = pd.Series(
+    today = datetime.today()
+    datetime_index = pd.Index(
         pd.date_range(
-            start=datetime.combine(datetime.today(), start_time),
-            end=datetime.combine(datetime.today(), end_time),
+            start=datetime.combine(today, start_time),
+            end=datetime.combine(today, end_time),
             freq=period
-        ).to_pydatetime()).apply(lambda x: x.time())
+        ).time)
 
-    # Create a dataframe with common time and its corresponding timestamp number
-    datetime_inter = pd.DataFrame(
-        range(datetime_index.shape[0]), index=datetime_index,
-        columns=["timestamp"]
-    )
+    # Common time in seconds used as interpolation abscissa
+    datetime_seconds = _time_to_seconds(datetime_index)
+    # Power parameters names in Excel file and their corresponding pandapower variables
+    power_variables: dict[str, str] = {"P [MW]": "p_mw", "Q [MVAR]": "q_mvar"}
     for eq_name, eq_power in power_profile.items():
-        # Create multi index columns from power profile
-        columns = pd.MultiIndex.from_tuples(
-            eq_power.columns, names=["profile", "power"]
-        )
-        # Concatenate power profile with created common datetime index
-        data_df = pd.concat([datetime_inter, eq_power], axis=1).sort_index()
-        # Fill timestamps unmatched using closest neighbors (forward and backward in order to fill every null)
-        data_df["timestamp"] = data_df["timestamp"].fillna(method='ffill').fillna(method='bfill')
-        # Group timestamp to keep only the first founded non-null value and then fill null values using
-        # first order interpolation
-        data_df = data_df \
-            .groupby("timestamp").first() \
-            .interpolate().fillna(method="bfill").fillna(method="ffill") \
-            # Create interpolated dataframe with good index and apply into results dictionary
-        actual_profile = pd.DataFrame(
-            data_df.values, index=datetime_inter.index, columns=columns
-        )
+        # Sort power profiles values by time
+        eq_seconds = _time_to_seconds(eq_power.index)
+        order = np.argsort(eq_seconds, kind="stable")
+        eq_seconds = eq_seconds[order]
+        eq_values = eq_power.to_numpy(dtype=np.float64)[order]
+        # Interpolate each power profile on the common time index using first order interpolation
+        # (values beyond first and last time steps are filled with the closest value)
+        profile_values = np.empty((datetime_seconds.shape[0], eq_values.shape[1]), dtype=np.float64)
+        for i in range(eq_values.shape[1]):
+            not_null = ~np.isnan(eq_values[:, i])
+            profile_values[:, i] = np.interp(datetime_seconds, eq_seconds[not_null], eq_values[not_null, i])
+        # Split interpolated values by power parameter and apply into results dictionary
+        profiles = eq_power.columns.get_level_values(0)
+        powers = eq_power.columns.get_level_values(1)
         results[eq_name] = dict()
-        if "P [MW]" in eq_power.columns.levels[1]:
-            results[eq_name]["p_mw"] = actual_profile.xs("P [MW]", level=1, axis=1).dropna(how="all", axis=1)
-        if "Q [MVAR]" in eq_power.columns.levels[1]:
-            results[eq_name]["q_mvar"] = actual_profile.xs("Q [MVAR]", level=1, axis=1).dropna(how="all", axis=1)
+        for power, variable in power_variables.items():
+            mask = np.asarray(powers == power)
+            if mask.any():
+                results[eq_name][variable] = pd.DataFrame(
+                    profile_values[:, mask], index=datetime_index, columns=pd.Index(profiles[mask], name="profile")
+                )
     return results
 
 
@@ -263,41 +293,53 @@ def apply_power_profile(net: pp.pandapowerNet, equipment: str, power_profiles: d
     >>> apply_power_profile(net=net, equipment="load", power_profiles=timeseries["load"])
 
     """
-    warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
     # Check if pandapower network already have controllers for the given equipment and delete them
     if not net.controller.empty:
-        old_controller_index = net.controller[net.controller.object.apply(lambda x: x.element) == equipment].index
-        net.controller = net.controller.drop(old_controller_index).reset_index(drop=True)
-    # Create a dictionary from profile_mapping column
-    profile_mapping: dict = net[equipment] \
-        .reset_index() \
-        .groupby("profile_mapping")["index"] \
-        .apply(list).to_dict()
+        elements = np.array([getattr(ctrl, "element", None) for ctrl in net.controller.object.values], dtype=object)
+        net.controller = net.controller[elements != equipment].reset_index(drop=True)
+    # Create a dictionary from profile_mapping column (equipment indices bucketed by sorted profile id)
+    profile_ids = net[equipment]["profile_mapping"].values
+    not_null = ~pd.isnull(profile_ids)
+    profile_ids = profile_ids[not_null]
+    eq_index = net[equipment].index.values[not_null]
+    order = np.argsort(profile_ids, kind="stable")
+    profile_keys, starts = np.unique(profile_ids[order], return_index=True)
+    ends = np.append(starts[1:], order.shape[0])
+    profile_mapping: dict = {
+        profile_id: eq_index[order[start:end]].tolist()
+        for profile_id, start, end in zip(profile_keys.tolist(), starts, ends)
+    }
     for variable, profile in power_profiles.items():
         if profile is not None:
             # TODO: description to be done
             if "time_index" in net.keys():
-                if not (net["time_index"] == pd.DataFrame(profile.index, columns=["Time"])).all().all():
+                if not np.array_equal(net["time_index"]["Time"].values, profile.index.values):
                     log.error("Simulation Profiles have not the same timestamps")
             else:
                 net["time_index"] = pd.DataFrame(profile.index, columns=["Time"])
             if profile_mapping:
-                mapped_profile = pd.DataFrame(index=profile.index)
-                for profile_id, eq_list in profile_mapping.items():
-                    if profile_id in profile.columns:
-                        mapped_profile[eq_list] = list(zip(*[list(profile[profile_id].values)] * len(eq_list)))
+                # Repeat each profile for every equipment mapped to it
+                mapped_ids = [profile_id for profile_id in profile_mapping.keys() if profile_id in profile.columns]
+                mapped_columns = [eq for profile_id in mapped_ids for eq in profile_mapping[profile_id]]
+                profile_positions = np.repeat(
+                    profile.columns.get_indexer(mapped_ids),
+                    [len(profile_mapping[profile_id]) for profile_id in mapped_ids]
+                )
             else:
-                mapped_profile = profile[net[equipment].index.intersection(profile.columns)]
+                mapped_columns = net[equipment].index.intersection(profile.columns)
+                profile_positions = profile.columns.get_indexer(mapped_columns)
+            # Gather every mapped profile in a single numpy array (time steps are numbered from 0 as DFData expects)
+            mapped_profile = pd.DataFrame(
+                profile.to_numpy(dtype=np.float64)[:, profile_positions], columns=mapped_columns
+            )
             unmapped_equipment = net[equipment].index.difference(mapped_profile.columns)
             if len(unmapped_equipment) != 0:
                 unmapped_eq_names = ", ".join(net[equipment].loc[unmapped_equipment, "name"].values)
                 log.warning("{} equipments have no {} profiles".format(unmapped_eq_names, variable))
-            mapped_profile.reset_index(drop=True, inplace=True)
 
             control.ConstControl(net, element=equipment, element_index=mapped_profile.columns,
                                  variable=variable, data_source=DFData(mapped_profile),
                                  profile_name=mapped_profile.columns)
-    warnings.simplefilter(action='default', category=pd.errors.PerformanceWarning)
 
 def create_output_writer(net: pp.pandapowerNet, add_results: [list[str] | str] = None):
     r"""Define which results will be stored as output.
@@ -337,10 +379,12 @@ def create_output_writer(net: pp.pandapowerNet, add_results: [list[str] | str] =
 
 
 def run_time_simulation(net: pp.pandapowerNet, output_filename: str = None,
-                        folder: str = r"output") -> dict[str, pd.DataFrame]:
+                        folder: str = r"output", output_format: str = "xlsx", **kwargs) -> dict[str, pd.DataFrame]:
     r"""Run a time-series power flow on a pandaPower network where power profiles has been applied to the load and the generators.
     
-    The results will then be converted into a dictionary of `DataFrames` and saved to an Excel file if desired.
+    The results will then be converted into a dictionary of `DataFrames` and saved to an Excel or a parquet file if desired.
+    Powerflow solver is compiled using numba when it is installed (the first run is slower since compiled functions
+    are cached in `__pycache__` folders of pandapower package).
 
     Parameters
     ----------
@@ -349,37 +393,268 @@ def run_time_simulation(net: pp.pandapowerNet, output_filename: str = None,
         `Controller <https://pandapower.readthedocs.io/en/v2.13.1/control/controller.html#constcontrol>`_;
         `OutputWriter <https://pandapower.readthedocs.io/en/v2.13.1/timeseries/output_writer.html>`_.
     output_filename : str, None
-        Write the name of the `.xlsx` file where the simulation results will be stored.
+        Write the name of the `.xlsx` or `.parquet` file where the simulation results will be stored.
         If this parameter is not filled, the function will not save the results.
     folder : str, "output"
         It is the folder name where results will be stored.
+    output_format : str, "xlsx"
+        Format of the results file (`xlsx` or `parquet`). Excel file contains one sheet per result with equipment
+        names as columns while parquet file contains every result in one compressed table with `(result, index)`
+        columns (equipment indices since names may not be unique). Parquet is much faster to write and read for long
+        simulations. The format is also deduced from `output_filename` extension if given.
+
+    Other Parameters
+    ----------------
+    **kwargs
+        Powerflow options passed to `pandapower.runpp <https://pandapower.readthedocs.io/en/v2.13.1/powerflow/ac.html>`_
+        at every time step (i.e. `algorithm="nr"`, `lightsim2grid=True`).
+        `numba` option is set by default depending on numba installation.
 
     Example
     -------
     >>> run_time_simulation(net=net, folder=".cache", output_filename="output_filename")
+    >>> run_time_simulation(net=net, folder=".cache", output_filename="output_filename", output_format="parquet")
     """
-    timeseries.run_timeseries(net, time_steps=range(net["time_index"].shape[0]), verbose=False)
+    # Check output format before running the simulation
+    if output_filename:
+        name, extension = os.path.splitext(output_filename)
+        if extension in [".xlsx", ".parquet"]:
+            output_filename, output_format = name, extension[1:]
+        if output_format not in ["xlsx", "parquet"]:
+            raise ValueError("Output format {} is not supported (use xlsx or parquet)".format(output_format))
+
+    kwargs.setdefault("numba", NUMBA_AVAILABLE)
+    timeseries.run_timeseries(net, time_steps=range(net["time_index"].shape[0]), verbose=False, **kwargs)
 
     results_df: dict[str, pd.DataFrame] = dict()
+    # Results with equipment indices as columns
+    index_results_df: dict[str, pd.DataFrame] = dict()
+    # Equipment index to name mappings (built only once per equipment)
+    name_mappings: dict[str, dict] = dict()
     for key, result in net.output_writer.at[0, "object"].output.items():
         if key != "Parameters":
-            results_df[key] = result.set_index(net["time_index"].Time)
+            index_results_df[key] = result.set_index(net["time_index"].Time)
             eq = key.replace("res_", "").split(".")[0]
-            name_mapping = dict(zip(net[eq].index, net[eq].name))
-            results_df[key] = results_df[key].rename(columns=name_mapping)
+            if eq not in name_mappings:
+                name_mappings[eq] = dict(zip(net[eq].index.values, net[eq].name.values))
+            results_df[key] = index_results_df[key].rename(columns=name_mappings[eq])
 
     if output_filename:
-        output_file_path = os.path.join(folder, output_filename + ".xlsx")
+        output_file_path = os.path.join(folder, output_filename + "." + output_format)
         try:
             if not os.path.exists(folder):
                 os.makedirs(folder)
-            writer: pd.ExcelWriter = pd.ExcelWriter(output_file_path)
-            for keys in results_df.keys():
-                results_df[keys].to_excel(writer, sheet_name=keys, index_label="Time")
-        except(Exception,):
+            if output_format == "parquet":
+                pd.concat(index_results_df, axis=1, names=["result", "index"]).to_parquet(
+                    output_file_path, compression="zstd"
+                )
+            else:
+                # xlsxwriter engine is faster than openpyxl to write large result tables
+                with pd.ExcelWriter(output_file_path, engine="xlsxwriter") as writer:
+                    for keys in results_df.keys():
+                        results_df[keys].to_excel(writer, sheet_name=keys, index_label="Time")
+        except(Exception,) as error:
             log.error(
                 "Error in {} function:\n".format(traceback.extract_stack()[-1].name) +
                 "Impossible to save simulation results in {} file\n".format(output_file_path) +
-                "Check output file path or if file is already open in your computer"
+                "Check output file path or if file is already open in your computer\n" +
+                "{}: {}".format(type(error).__name__, error)
             )
-    return results_df
\ No newline at end of file
+    return results_df
+
+
+def _file_version(file_path: str) -> tuple[int, int]:
+    r"""Internal function used to identify a version of a file in order to invalidate cached readings.
+
+    Modification time is used in nanoseconds and completed with file size since modification time resolution can be
+    coarse on some file systems (or preserved when a file is copied).
+
+    Parameters
+    ----------
+    file_path : str
+        File path.
+
+    Returns
+    -------
+    file_version : tuple[int, int]
+        Modification time (in nanoseconds) and size of the file.
+
+    """
+    file_stat = os.stat(file_path)
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+
+@functools.lru_cache(maxsize=8)
+def _read_net_sheets(file_path: str, file_version: tuple, read_types: tuple, max_workers: int) -> MappingProxyType:
+    r"""Internal function used to read every sheet table of a power network xlsx file in a single pass.
+
+    Results are cached using file path, modification time and size as key, so an edited file is read again.
+    Returned DataFrames are shared between calls and must not be modified in place.
+
+    Parameters
+    ----------
+    file_path : str
+        Absolute file path of the xlsx file where the power network data are stored.
+    file_version : tuple[int, int]
+        Modification time (in nanoseconds) and size of the xlsx file.
+    read_types : tuple[tuple[str, type | str]]
+        Column name and type pairs applied while reading sheet tables (tuple in order to be hashable).
+    max_workers : int
+        Number of threads used to read sheet tables in parallel.
+
+    Returns
+    -------
+    all_sheets : MappingProxyType[str, pandas.DataFrame]
+        Read-only dictionary of non-empty raw sheet tables.
+
+    """
+    return _read_sheets(file_path, header_rows=1, max_workers=max_workers, dtype=dict(read_types))
+
+
+@functools.lru_cache(maxsize=8)
+def _read_profile_sheets(file_path: str, file_version: tuple, max_workers: int) -> MappingProxyType:
+    r"""Internal function used to read every sheet table of a power profile xlsx file in a single pass.
+
+    Results are cached using file path, modification time and size as key, so an edited file is read again.
+    Returned DataFrames are shared between calls and must not be modified in place.
+
+    Parameters
+    ----------
+    file_path : str
+        Absolute file path of the xlsx file where the power profiles are stored.
+    file_version : tuple[int, int]
+        Modification time (in nanoseconds) and size of the xlsx file.
+    max_workers : int
+        Number of threads used to read sheet tables in parallel.
+
+    Returns
+    -------
+    all_sheets : MappingProxyType[str, pandas.DataFrame]
+        Read-only dictionary of non-empty raw sheet tables.
+
+    """
+    return _read_sheets(file_path, header_rows=2, max_workers=max_workers, header=[0, 1], index_col=0)
+
+
+def _read_sheets(file_path: str, header_rows: int, max_workers: int, **kwargs) -> MappingProxyType:
+    r"""Internal function used to read every non-empty sheet table of a xlsx file, sequentially or in parallel.
+
+    Sequential reading uses only one file handle. Parallel reading uses one file handle per thread since
+    openpyxl workbooks can not be shared between threads.
+
+    Parameters
+    ----------
+    file_path : str
+        File path of the xlsx file.
+    header_rows : int
+        Number of header rows of sheet tables.
+    max_workers : int
+        Number of threads used to read sheet tables in parallel (sequential reading if lower than 2).
+    **kwargs
+        Parameters passed to pandas.read_excel.
+
+    Returns
+    -------
+    all_sheets : MappingProxyType[str, pandas.DataFrame]
+        Read-only dictionary of non-empty raw sheet tables.
+
+    """
+    with pd.ExcelFile(file_path, engine="openpyxl") as xl:
+        sheet_names = _non_empty_sheet_names(xl, header_rows=header_rows)
+        if not sheet_names:
+            return MappingProxyType({})
+        if max_workers < 2 or len(sheet_names) < 2:
+            return MappingProxyType(pd.read_excel(xl, sheet_name=sheet_names, **kwargs))
+
+    thread_data = threading.local()
+    handles: list[pd.ExcelFile] = []
+
+    def read_sheet(sheet_name: str) -> pd.DataFrame:
+        # Open the xlsx file only once per thread and reuse it for every sheet table read by this thread
+        if not hasattr(thread_data, "xl"):
+            thread_data.xl = pd.ExcelFile(file_path, engine="openpyxl")
+            handles.append(thread_data.xl)
+        return pd.read_excel(thread_data.xl, sheet_name=sheet_name, **kwargs)
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(sheet_names))) as executor:
+            return MappingProxyType(dict(zip(sheet_names, executor.map(read_sheet, sheet_names))))
+    finally:
+        for xl in handles:
+            xl.close()
+
+
+def _check_column_types(data_df: pd.DataFrame, dtype_map: dict, type_names: dict, eq_name: str):
+    r"""Internal function used to find the first column which can not be converted into its wanted type.
+
+    Parameters
+    ----------
+    data_df : pandas.DataFrame
+        Equipment table.
+    dtype_map : dict
+        Wanted type of every column to be converted.
+    type_names : dict
+        Type names used in error messages.
+    eq_name : str
+        Equipment name used in error messages.
+
+    Raises
+    ------
+    RuntimeError
+        If one column can not be converted into its wanted type.
+
+    """
+    for col, dtype in dtype_map.items():
+        try:
+            data_df[col].astype(dtype)
+        except(Exception, ):
+            raise RuntimeError("Impossible to convert {} column into {} in {} equipment.".format(
+                col, type_names[dtype], eq_name))
+
+
+def _non_empty_sheet_names(xl: pd.ExcelFile, header_rows: int) -> list[str]:
+    r"""Internal function used to find sheet tables containing data without parsing them into DataFrames.
+
+    Sheet rows are scanned in openpyxl read-only mode until the first value found below the header. Dimensions
+    stored in the xlsx file are not trusted since they can be wrong (they are reset before scanning).
+
+    Parameters
+    ----------
+    xl : pandas.ExcelFile
+        Opened xlsx file (openpyxl engine).
+    header_rows : int
+        Number of header rows of sheet tables.
+
+    Returns
+    -------
+    sheet_names : list[str]
+        Names of sheets which have at least one value below their header.
+
+    """
+    sheet_names: list[str] = []
+    for ws in xl.book.worksheets:
+        ws.reset_dimensions()
+        rows = ws.iter_rows(min_row=header_rows + 1, values_only=True)
+        if any(value is not None for row in rows for value in row):
+            sheet_names.append(ws.title)
+    return sheet_names
+
+
+def _time_to_seconds(time_stamps: [pd.Index | list | tuple]) -> np.ndarray:
+    r"""Internal function used to convert time objects into the number of seconds elapsed since midnight.
+
+    Parameters
+    ----------
+    time_stamps : pandas.Index | list | tuple
+        Input time objects (datetime.time).
+
+    Returns
+    -------
+    seconds : numpy.ndarray
+        Number of seconds since midnight of every time object.
+
+    """
+    return np.fromiter(
+        (t.hour * 3600 + t.minute * 60 + t.second + t.microsecond * 1e-6 for t in time_stamps),
+        dtype=np.float64, count=len(time_stamps)
+    )